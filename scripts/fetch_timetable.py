@@ -12,15 +12,22 @@ Configuration (no secrets are hardcoded here):
         Option C: Discrete vars: GOOGLE_PROJECT_ID, GOOGLE_PRIVATE_KEY_ID, GOOGLE_PRIVATE_KEY,
                          GOOGLE_CLIENT_EMAIL, GOOGLE_CLIENT_ID
     Also set: SPREADSHEET_ID (required), optionally SHEET_RANGE.
+    If the Drive API is enabled for the service account's project, runs are skipped
+    when the spreadsheet has not been modified since the last fetch (use --force to override).
 
 - Local development: create scripts/.env with the same variables, or pass --credentials to a JSON file.
 """
 
 import os
+import re
+import hashlib
+import functools
 import json
 import sqlite3
-import uuid
-from datetime import datetime, timedelta
+import orjson
+from contextlib import closing
+from dataclasses import dataclass
+from datetime import datetime
 from typing import List, Dict, Optional, Tuple
 from urllib.parse import quote
 from google.oauth2 import service_account
@@ -29,8 +36,129 @@ from googleapiclient.errors import HttpError
 from dotenv import load_dotenv
 
 
+# The database is regenerated from the spreadsheet on every run, so durability
+# can be traded for speed: no fsyncs, in-memory journal and temp storage.
+SQLITE_PRAGMAS = """
+    PRAGMA journal_mode=MEMORY;
+    PRAGMA synchronous=OFF;
+    PRAGMA temp_store=MEMORY;
+    PRAGMA cache_size=-65536;
+"""
+
+# Bump when the DDL below changes; stored in the database's PRAGMA user_version
+SCHEMA_VERSION = 1
+
+TIMETABLE_ENTRIES_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS {table} (
+        id INTEGER PRIMARY KEY,
+        group_name TEXT NOT NULL,
+        day TEXT NOT NULL,
+        start_time TEXT NOT NULL,
+        end_time TEXT NOT NULL,
+        duration_minutes INTEGER NOT NULL,
+        course_code TEXT NOT NULL,
+        course_name TEXT NOT NULL,
+        instructor TEXT NOT NULL,
+        room TEXT NOT NULL,
+        credits INTEGER DEFAULT 3,
+        entry_type TEXT DEFAULT 'Lecture',
+        created_at TEXT NOT NULL,
+        updated_at TEXT NOT NULL
+    )
+"""
+
+TIMETABLE_ENTRIES_INDEX = """
+    CREATE INDEX IF NOT EXISTS idx_group_day_start
+    ON timetable_entries (group_name, day, start_time)
+"""
+
+WEEKDAYS = ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday")
+_WEEKDAY_SET = frozenset(WEEKDAYS)
+_GROUP_RE = re.compile(r"Group ([ABC])")
+
+# "H:MM AM - H:MM PM", where either AM/PM suffix may be missing
+_TIME_RE = re.compile(
+    r"(\d{1,2}):(\d{2})\s*(AM|PM)?\s*-\s*(\d{1,2}):(\d{2})\s*(AM|PM)?",
+    re.IGNORECASE,
+)
+
+
+def _format_minutes(minutes: int) -> str:
+    """Format minutes since midnight as 24-hour "HH:MM"."""
+    return f"{minutes // 60 % 24:02d}:{minutes % 60:02d}"
+
+
+@functools.lru_cache(maxsize=512)
+def _parse_course(class_info: str) -> Optional[Tuple[str, str, str, str, str]]:
+    """
+    Parse a cell's text into (course_code, course_name, instructor, room, entry_type).
+    The same course text repeats across rows, days and groups, so results are cached.
+    """
+    lines = [ln.strip() for ln in class_info.split('\n') if ln.strip()]
+    if not lines:
+        return None
+
+    course_name = lines[0].strip()
+    instructor = lines[1].strip().replace(
+        '[', '').replace(']', '') if len(lines) > 1 else "TBD"
+    room = lines[2].strip().replace('[', '').replace(']',
+                                                     '') if len(lines) > 2 else "TBD"
+
+    course_code = ''.join([word[0].upper()
+                          for word in course_name.split()[:3] if word])
+    entry_type = "Lab" if "lab" in course_name.lower() else "Lecture"
+    if entry_type == "Lab":
+        course_name = course_name.replace("Lab", "").strip()
+
+    return course_code, course_name, instructor, room, entry_type
+
+
+@dataclass
+class TimetableEntry:
+    """A parsed class block. Times are minutes since midnight until exported."""
+    __slots__ = ("id", "group", "day", "start_min", "end_min", "course_code",
+                 "course_name", "instructor", "room", "credits", "entry_type")
+
+    id: Optional[int]
+    group: str
+    day: str
+    start_min: int
+    end_min: int
+    course_code: str
+    course_name: str
+    instructor: str
+    room: str
+    credits: int
+    entry_type: str
+
+    @property
+    def duration_minutes(self) -> int:
+        return self.end_min - self.start_min
+
+    def to_json(self) -> Dict:
+        """Return the nested dict shape used by the frontend JSON files."""
+        return {
+            "id": self.id,
+            "group": self.group,
+            "day": self.day,
+            "time_slot": {
+                "start_time": _format_minutes(self.start_min),
+                "end_time": _format_minutes(self.end_min),
+                "duration_minutes": self.duration_minutes
+            },
+            "course": {
+                "course_code": self.course_code,
+                "course_name": self.course_name,
+                "instructor": self.instructor,
+                "credits": self.credits
+            },
+            "room": self.room,
+            "entry_type": self.entry_type
+        }
+
+
 class TimetableDataFetcher:
-    def __init__(self, credentials_path: Optional[str] = None):
+    def __init__(self, credentials_path: Optional[str] = None, pretty_json: bool = False):
         # Load local .env
         load_dotenv(
             dotenv_path=os.path.join(os.path.dirname(__file__), ".env"),
@@ -51,21 +179,58 @@ class TimetableDataFetcher:
         self.json_output_path = os.path.join(
             repo_root, "frontend", "public", "data")
         self.credentials = None
-        self.service = None
+        # Google API clients are built on first use rather than up front
+        self._credentials_path = credentials_path
+        self._service = None
+        self._drive_service = None
+        self._titles: Optional[List[str]] = None
 
         self.default_range = os.getenv("SHEET_RANGE", "A:S")
+        self.pretty_json = pretty_json
 
         # Ensure directories exist
         os.makedirs(os.path.dirname(self.database_path), exist_ok=True)
         os.makedirs(self.json_output_path, exist_ok=True)
 
-        self._initialize_service(credentials_path)
         self._initialize_database()
 
-    def _initialize_service(self, credentials_path: Optional[str] = None):
-        """Initialize Google Sheets service (from file, JSON env, or discrete env vars)."""
+    @property
+    def service(self):
+        """Google Sheets API client, built on first access."""
+        if self._service is None:
+            try:
+                self._service = build(
+                    'sheets', 'v4', credentials=self._get_credentials(), cache_discovery=False)
+                print("✅ Google Sheets service initialized successfully")
+            except Exception:
+                print("❌ Failed to initialize Google Sheets service.")
+                raise
+        return self._service
+
+    @property
+    def drive_service(self):
+        """Google Drive API client, built on first access."""
+        if self._drive_service is None:
+            try:
+                self._drive_service = build(
+                    'drive', 'v3', credentials=self._get_credentials(), cache_discovery=False)
+                print("✅ Google Drive service initialized successfully")
+            except Exception:
+                print("❌ Failed to initialize Google Drive service.")
+                raise
+        return self._drive_service
+
+    def _get_credentials(self):
+        """Resolve service account credentials (from file, JSON env, or discrete env vars) once."""
+        if self.credentials is not None:
+            return self.credentials
+
+        credentials_path = self._credentials_path
         try:
-            scopes = ['https://www.googleapis.com/auth/spreadsheets.readonly']
+            scopes = [
+                'https://www.googleapis.com/auth/spreadsheets.readonly',
+                'https://www.googleapis.com/auth/drive.metadata.readonly',
+            ]
 
             # Priority 1: explicit credentials file via CLI
             if credentials_path and os.path.exists(credentials_path):
@@ -126,37 +291,32 @@ class TimetableDataFetcher:
                         creds_json, scopes=scopes
                     )
 
-            self.service = build('sheets', 'v4', credentials=self.credentials)
-            print("✅ Google Sheets service initialized successfully")
+            return self.credentials
 
         except Exception:
-            print("❌ Failed to initialize Google Sheets service.")
+            print("❌ Failed to load Google credentials.")
             raise
 
+    def _connect(self) -> sqlite3.Connection:
+        """Open the SQLite database with the write-optimized pragmas applied."""
+        conn = sqlite3.connect(self.database_path)
+        conn.executescript(SQLITE_PRAGMAS)
+        return conn
+
     def _initialize_database(self):
         """Initialize SQLite database"""
         try:
-            with sqlite3.connect(self.database_path) as conn:
+            with closing(self._connect()) as conn, conn:
                 cursor = conn.cursor()
 
-                cursor.execute("""
-                    CREATE TABLE IF NOT EXISTS timetable_entries (
-                        id TEXT PRIMARY KEY,
-                        group_name TEXT NOT NULL,
-                        day TEXT NOT NULL,
-                        start_time TEXT NOT NULL,
-                        end_time TEXT NOT NULL,
-                        duration_minutes INTEGER NOT NULL,
-                        course_code TEXT NOT NULL,
-                        course_name TEXT NOT NULL,
-                        instructor TEXT NOT NULL,
-                        room TEXT NOT NULL,
-                        credits INTEGER DEFAULT 3,
-                        entry_type TEXT DEFAULT 'Lecture',
-                        created_at TEXT NOT NULL,
-                        updated_at TEXT NOT NULL
-                    )
-                """)
+                version = cursor.execute("PRAGMA user_version").fetchone()[0]
+                if version == SCHEMA_VERSION:
+                    print("✅ Database schema up to date")
+                    return
+
+                cursor.execute(TIMETABLE_ENTRIES_SCHEMA.format(
+                    table="timetable_entries"))
+                cursor.execute(TIMETABLE_ENTRIES_INDEX)
 
                 cursor.execute("""
                     CREATE TABLE IF NOT EXISTS metadata (
@@ -165,6 +325,7 @@ class TimetableDataFetcher:
                         updated_at TEXT NOT NULL
                     )
                 """)
+                cursor.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
 
                 conn.commit()
                 print("✅ Database initialized successfully")
@@ -173,36 +334,75 @@ class TimetableDataFetcher:
             print(f"❌ Failed to initialize database: {str(e)}")
             raise
 
+    def _get_metadata(self, key: str) -> Optional[str]:
+        """Read a value from the metadata table, or None if it is not set."""
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT value FROM metadata WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_metadata(self, items: Dict[str, str]):
+        """Insert or update values in the metadata table."""
+        now_iso = datetime.now().isoformat()
+        with closing(self._connect()) as conn, conn:
+            conn.executemany("""
+                INSERT OR REPLACE INTO metadata (key, value, updated_at)
+                VALUES (?, ?, ?)
+            """, [(key, value, now_iso) for key, value in items.items()])
+
+    def get_spreadsheet_revision(self) -> Optional[str]:
+        """Return the spreadsheet's Drive modifiedTime, or None if it cannot be read."""
+        try:
+            meta = self.drive_service.files().get(
+                fileId=self.spreadsheet_id,
+                fields="modifiedTime"
+            ).execute()
+            return meta.get("modifiedTime")
+        except HttpError as e:
+            print(f"⚠️ Could not read spreadsheet revision, fetching anyway: {e}")
+            return None
+
     def get_sheet_titles(self) -> List[str]:
         """Return all worksheet (tab) titles in the spreadsheet."""
-        meta = self.service.spreadsheets().get(
-            spreadsheetId=self.spreadsheet_id
+        if self._titles is None:
+            meta = self.service.spreadsheets().get(
+                spreadsheetId=self.spreadsheet_id,
+                fields="sheets.properties.title"
+            ).execute()
+            self._titles = [s["properties"]["title"]
+                            for s in meta.get("sheets", [])]
+        return self._titles
+
+    def fetch_ranges(self, ranges: List[str]) -> List[List[List[str]]]:
+        """Fetch several A1 ranges in a single batchGet request, in the order given."""
+        result = self.service.spreadsheets().values().batchGet(
+            spreadsheetId=self.spreadsheet_id,
+            ranges=ranges
         ).execute()
-        return [s["properties"]["title"] for s in meta.get("sheets", [])]
-
-    def fetch_sheet_data(self, sheet_index: int = 0, range_override: Optional[str] = None):
+        return [vr.get("values", []) for vr in result.get("valueRanges", [])]
+
+    def fetch_sheet_data(
+        self,
+        sheet_index: int = 0,
+        range_override: Optional[str] = None,
+        sheet_name: Optional[str] = None,
+    ):
         """Fetch data from a worksheet."""
         try:
-            if not self.service:
-                raise RuntimeError("Google Sheets service not initialized")
-
-            titles = self.get_sheet_titles()
-            if sheet_index < 0 or sheet_index >= len(titles):
-                raise IndexError(
-                    f"Sheet index {sheet_index} out of range (found {len(titles)} sheets).")
-
-            sheet_name = titles[sheet_index]
             a1_range = range_override or self.default_range
+            if sheet_name is None:
+                # Resolve by title rather than sending a bare range: a bare range
+                # means the first *visible* sheet, while sheet_index counts hidden ones
+                titles = self.get_sheet_titles()
+                if sheet_index < 0 or sheet_index >= len(titles):
+                    raise IndexError(
+                        f"Sheet index {sheet_index} out of range (found {len(titles)} sheets).")
+                sheet_name = titles[sheet_index]
             range_to_use = f"'{sheet_name}'!{a1_range}"
 
             print(
                 f"📥 Fetching data from sheet {sheet_index} ({sheet_name}) range {a1_range}")
-            result = self.service.spreadsheets().values().get(
-                spreadsheetId=self.spreadsheet_id,
-                range=range_to_use
-            ).execute()
-
-            values = result.get("values", [])
+            values = self.fetch_ranges([range_to_use])[0]
             print(f"✅ Fetched {len(values)} rows from {sheet_name}")
             return values
 
@@ -219,12 +419,14 @@ class TimetableDataFetcher:
         day_row = None
         # Scan first few rows for headers
         for i, row in enumerate(raw_data[:6]):
-            row_strs = [str(c) for c in row]
-            if any("Group A" in s or "Group B" in s or "Group C" in s for s in row_strs):
-                group_row = i
-            if any(s in ("Monday", "Tuesday", "Wednesday", "Thursday", "Friday") for s in row_strs):
-                day_row = i
-                # keep searching group_row in case it appears after day row within first few
+            for c in row:
+                if not isinstance(c, str):
+                    continue
+                if c in _WEEKDAY_SET:
+                    day_row = i
+                    # keep searching group_row in case it appears after day row within first few
+                elif _GROUP_RE.search(c):
+                    group_row = i
         return group_row, day_row
 
     def _map_group_day_columns(
@@ -234,7 +436,6 @@ class TimetableDataFetcher:
         Build a mapping of group -> list of (column_index, day_name).
         Robust to spacing and varying empty columns.
         """
-        days = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"]
         day_row_vals = raw_data[day_row] if day_row < len(raw_data) else []
         group_row_vals = raw_data[group_row] if group_row < len(
             raw_data) else []
@@ -242,13 +443,9 @@ class TimetableDataFetcher:
         # Find starting column for each group
         group_starts: Dict[str, int] = {}
         for idx, val in enumerate(group_row_vals):
-            sval = str(val)
-            if "Group A" in sval:
-                group_starts["A"] = idx
-            elif "Group B" in sval:
-                group_starts["B"] = idx
-            elif "Group C" in sval:
-                group_starts["C"] = idx
+            m = _GROUP_RE.search(str(val))
+            if m:
+                group_starts[m.group(1)] = idx
 
         # Determine an upper bound for each group's section (next group's start or end of row)
         ordered_groups = [(g, group_starts[g]) for g in sorted(
@@ -265,7 +462,7 @@ class TimetableDataFetcher:
             g: [] for g in group_starts.keys()}
         for g, (start, end) in section_bounds.items():
             used = set()
-            for d in days:
+            for d in WEEKDAYS:
                 # Find the next occurrence of this day within the group's section
                 found_col = None
                 for c in range(start, end):
@@ -280,14 +477,14 @@ class TimetableDataFetcher:
 
         return group_cols
 
-    def parse_timetable_data(self, raw_data: List[List[str]]) -> Dict[str, List[Dict]]:
+    def parse_timetable_data(self, raw_data: List[List[str]]) -> Dict[str, List[TimetableEntry]]:
         """Parse raw sheet data into structured timetable entries"""
         if not raw_data or len(raw_data) < 3:
             print("⚠️ No data to parse")
             return {"A": [], "B": [], "C": []}
 
         print("🔄 Parsing timetable data...")
-        group_entries: Dict[str, List[Dict]] = {"A": [], "B": [], "C": []}
+        group_entries: Dict[str, List[TimetableEntry]] = {"A": [], "B": [], "C": []}
 
         # Find header rows dynamically
         group_row, day_row = self._find_header_rows(raw_data)
@@ -303,246 +500,245 @@ class TimetableDataFetcher:
         for g, cols in group_day_cols.items():
             print(f"📅 Group {g} columns: {cols}")
 
+        # Flatten once so each row is a single pass over (group, day, col)
+        flat_cols = [(g, d, c) for g, cols in group_day_cols.items()
+                     for c, d in cols]
+
         # Track last entry to merge multi-row classes
-        last_entry_map: Dict[Tuple[str, str, int], Dict] = {}
+        last_entry_map: Dict[Tuple[str, str, int], TimetableEntry] = {}
+        # Sequential ids, shared by the JSON entries and the database rowids
+        next_id = 1
 
         for row_idx in range(day_row + 1, len(raw_data)):
             row = raw_data[row_idx]
             if not row:
                 continue
 
-            time_info = row[0] if len(row) > 0 else ""
+            time_info = row[0]
             if not isinstance(time_info, str) or ("AM" not in time_info and "PM" not in time_info):
                 continue
 
-            try:
-                if " - " in time_info:
-                    start_time_raw, end_time_raw = time_info.split(" - ", 1)
-                    start_time, end_time = self._clean_time(
-                        start_time_raw.strip(), end_time_raw.strip())
-                else:
-                    continue
-            except Exception:
+            parsed = self._clean_time(time_info)
+            if parsed is None:
                 continue
+            start_min, end_min = parsed
 
-            for group, cols in group_day_cols.items():
-                for col, day in cols:
-                    key = (group, day, col)
-                    cell = row[col] if col < len(row) else ""
-                    text = cell.strip() if isinstance(cell, str) else ""
+            row_len = len(row)
+            for group, day, col in flat_cols:
+                key = (group, day, col)
+                cell = row[col] if col < row_len else ""
+                text = cell.strip() if isinstance(cell, str) else ""
 
-                    # Breaks end any ongoing entry
-                    if text.upper() == "LUNCH":
-                        if key in last_entry_map:
-                            del last_entry_map[key]
-                        continue
-
-                    # Blank cell under a merged block → extend previous entry to this row's end_time
-                    if not text:
-                        if key in last_entry_map:
-                            prev = last_entry_map[key]
-                            prev["time_slot"]["end_time"] = end_time
-                            sh, sm = map(
-                                int, prev["time_slot"]["start_time"].split(":"))
-                            eh, em = map(int, end_time.split(":"))
-                            prev["time_slot"]["duration_minutes"] = (
-                                eh * 60 + em) - (sh * 60 + sm)
-                        continue
+                # Breaks end any ongoing entry
+                if text.upper() == "LUNCH":
+                    last_entry_map.pop(key, None)
+                    continue
 
-                    # Non-empty cell → parse and create/extend entry
-                    entry = self._parse_class_info(
-                        text, group, day, start_time, end_time)
-                    if not entry:
-                        if key in last_entry_map:
-                            prev = last_entry_map[key]
-                            prev["time_slot"]["end_time"] = end_time
-                            sh, sm = map(
-                                int, prev["time_slot"]["start_time"].split(":"))
-                            eh, em = map(int, end_time.split(":"))
-                            prev["time_slot"]["duration_minutes"] = (
-                                eh * 60 + em) - (sh * 60 + sm)
-                        continue
+                # A blank cell under a merged block, an unparseable cell, or the
+                # same class continuing across rows → extend the previous entry
+                prev = last_entry_map.get(key)
+                entry = self._parse_class_info(
+                    text, group, day, start_min, end_min) if text else None
+                if entry is None or (prev is not None and entry.course_code == prev.course_code):
+                    if prev is not None:
+                        prev.end_min = end_min
+                    continue
 
-                    if key in last_entry_map:
-                        prev = last_entry_map[key]
-                        # Same class continuing across rows → extend
-                        if entry["course"]["course_code"] == prev["course"]["course_code"]:
-                            prev["time_slot"]["end_time"] = end_time
-                            sh, sm = map(
-                                int, prev["time_slot"]["start_time"].split(":"))
-                            eh, em = map(int, end_time.split(":"))
-                            prev["time_slot"]["duration_minutes"] = (
-                                eh * 60 + em) - (sh * 60 + sm)
-                        else:
-                            # New class starts here
-                            group_entries[group].append(entry)
-                            last_entry_map[key] = entry
-                    else:
-                        # First row of a class block
-                        group_entries[group].append(entry)
-                        last_entry_map[key] = entry
+                # First row of a class block, or a new class starting here
+                entry.id = next_id
+                next_id += 1
+                group_entries[group].append(entry)
+                last_entry_map[key] = entry
 
         for group, entries in group_entries.items():
             print(f"📚 Group {group}: {len(entries)} classes")
 
         return group_entries
 
-    def _clean_time(self, start_time: str, end_time: str) -> tuple[str, str]:
-        try:
-            def parse(t, suffix=None):
-                ts = t.strip().upper()
-                if "AM" in ts or "PM" in ts:
-                    return datetime.strptime(ts.replace(" ", ""), "%I:%M%p")
-                return datetime.strptime(ts + suffix, "%I:%M%p")
-
-            options = []
-            start_has = any(x in start_time.upper() for x in ["AM", "PM"])
-            end_has = any(x in end_time.upper() for x in ["AM", "PM"])
-
-            for sfx_s in (["AM", "PM"] if not start_has else [None]):
-                for sfx_e in (["AM", "PM"] if not end_has else [None]):
-                    try:
-                        s = parse(start_time, sfx_s or "")
-                        e = parse(end_time,   sfx_e or "")
-                        if e < s:
-                            e += timedelta(days=1)
-                        dur = (e - s).total_seconds()/60
-                        if dur > 0:
-                            options.append((dur, s, e))
-                    except:
-                        pass
-
-            if not options:
-                return start_time, end_time
-
-            _, s, e = min(options, key=lambda x: x[0])
-            return s.strftime("%H:%M"), e.strftime("%H:%M")
-        except Exception:
-            return start_time, end_time
+    def _clean_time(self, time_info: str) -> Optional[Tuple[int, int]]:
+        """
+        Parse a "H:MM AM - H:MM PM" slot into (start_min, end_min) minutes since midnight.
+        A missing AM/PM suffix is resolved to whichever choice gives the shortest
+        positive duration. Returns None if the slot cannot be parsed.
+        """
+        m = _TIME_RE.search(time_info)
+        if not m:
+            return None
+
+        sh, sm, s_sfx, eh, em, e_sfx = m.groups()
+        sh, sm, eh, em = int(sh), int(sm), int(eh), int(em)
+        if not (1 <= sh <= 12 and 1 <= eh <= 12 and sm < 60 and em < 60):
+            return None
+
+        best = None
+        for s_pm in ((s_sfx.upper() == "PM",) if s_sfx else (False, True)):
+            start = (sh % 12 + 12 * s_pm) * 60 + sm
+            for e_pm in ((e_sfx.upper() == "PM",) if e_sfx else (False, True)):
+                end = (eh % 12 + 12 * e_pm) * 60 + em
+                duration = (end - start) % 1440
+                if duration and (best is None or duration < best[1]):
+                    best = (start, duration)
+
+        if best is None:
+            return None
+
+        start_min, duration = best
+        return start_min, start_min + duration
 
-    def _parse_class_info(self, class_info: str, group: str, day: str, start_time: str, end_time: str) -> Optional[Dict]:
+    def _parse_class_info(self, class_info: str, group: str, day: str, start_min: int, end_min: int) -> Optional[TimetableEntry]:
         try:
-            lines = [ln.strip() for ln in class_info.split('\n') if ln.strip()]
-            if not lines:
+            course = _parse_course(class_info)
+            if course is None:
                 return None
 
-            course_name = lines[0].strip()
-            instructor = lines[1].strip().replace(
-                '[', '').replace(']', '') if len(lines) > 1 else "TBD"
-            room = lines[2].strip().replace('[', '').replace(']',
-                                                             '') if len(lines) > 2 else "TBD"
-
-            course_code = ''.join([word[0].upper()
-                                  for word in course_name.split()[:3] if word])
-            sh, sm = map(int, start_time.split(':'))
-            eh, em = map(int, end_time.split(':'))
-            duration = (eh * 60 + em) - (sh * 60 + sm)
-
-            entry_type = "Lab" if "lab" in course_name.lower() else "Lecture"
-
-            return {
-                "id": str(uuid.uuid4()),
-                "group": group,
-                "day": day,
-                "time_slot": {
-                    "start_time": start_time,
-                    "end_time": end_time,
-                    "duration_minutes": duration
-                },
-                "course": {
-                    "course_code": course_code,
-                    "course_name": course_name.replace("Lab", "").strip() if entry_type == "Lab" else course_name,
-                    "instructor": instructor,
-                    "credits": 3
-                },
-                "room": room,
-                "entry_type": entry_type
-            }
+            course_code, course_name, instructor, room, entry_type = course
+            return TimetableEntry(
+                id=None,
+                group=group,
+                day=day,
+                start_min=start_min,
+                end_min=end_min,
+                course_code=course_code,
+                course_name=course_name,
+                instructor=instructor,
+                room=room,
+                credits=3,
+                entry_type=entry_type
+            )
         except Exception:
             return None
 
-    def save_to_database(self, timetable_data: Dict[str, List[Dict]]):
+    def save_to_database(self, timetable_data: Dict[str, List[TimetableEntry]], now_iso: Optional[str] = None):
         """Save parsed data to SQLite database"""
         try:
             print("💾 Saving data to database...")
 
-            with sqlite3.connect(self.database_path) as conn:
+            now_iso = now_iso or datetime.now().isoformat()
+            rows = [
+                (
+                    entry.id,
+                    entry.group,
+                    entry.day,
+                    _format_minutes(entry.start_min),
+                    _format_minutes(entry.end_min),
+                    entry.duration_minutes,
+                    entry.course_code,
+                    entry.course_name,
+                    entry.instructor,
+                    entry.room,
+                    entry.credits,
+                    entry.entry_type,
+                    now_iso,
+                    now_iso
+                )
+                for entries in timetable_data.values()
+                for entry in entries
+            ]
+            total_entries = len(rows)
+
+            with closing(self._connect()) as conn, conn:
+                # Manage the transaction ourselves so the whole rewrite is one commit
+                conn.isolation_level = None
                 cursor = conn.cursor()
-                cursor.execute("DELETE FROM timetable_entries")
-
-                total_entries = 0
-                for group, entries in timetable_data.items():
-                    for entry in entries:
-                        cursor.execute("""
-                            INSERT INTO timetable_entries 
-                            (id, group_name, day, start_time, end_time, duration_minutes,
-                             course_code, course_name, instructor, room, credits, entry_type,
-                             created_at, updated_at)
-                            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                        """, (
-                            entry["id"],
-                            entry["group"],
-                            entry["day"],
-                            entry["time_slot"]["start_time"],
-                            entry["time_slot"]["end_time"],
-                            entry["time_slot"]["duration_minutes"],
-                            entry["course"]["course_code"],
-                            entry["course"]["course_name"],
-                            entry["course"]["instructor"],
-                            entry["room"],
-                            entry["course"]["credits"],
-                            entry["entry_type"],
-                            datetime.now().isoformat(),
-                            datetime.now().isoformat()
-                        ))
-                        total_entries += 1
-
-                cursor.execute("""
-                    INSERT OR REPLACE INTO metadata (key, value, updated_at)
-                    VALUES (?, ?, ?)
-                """, ("last_updated", datetime.now().isoformat(), datetime.now().isoformat()))
+                cursor.execute("BEGIN")
+                try:
+                    # Load into a fresh, index-free table and swap it in, instead of
+                    # deleting and re-inserting every row of the live table
+                    cursor.execute("DROP TABLE IF EXISTS timetable_entries_new")
+                    cursor.execute(TIMETABLE_ENTRIES_SCHEMA.format(
+                        table="timetable_entries_new"))
+
+                    cursor.executemany("""
+                        INSERT INTO timetable_entries_new
+                        (id, group_name, day, start_time, end_time, duration_minutes,
+                         course_code, course_name, instructor, room, credits, entry_type,
+                         created_at, updated_at)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    """, rows)
+
+                    cursor.execute("DROP TABLE IF EXISTS timetable_entries")
+                    cursor.execute(
+                        "ALTER TABLE timetable_entries_new RENAME TO timetable_entries")
+                    cursor.execute(TIMETABLE_ENTRIES_INDEX)
+
+                    cursor.executemany("""
+                        INSERT OR REPLACE INTO metadata (key, value, updated_at)
+                        VALUES (?, ?, ?)
+                    """, [
+                        ("last_updated", now_iso, now_iso),
+                        ("total_entries", str(total_entries), now_iso),
+                    ])
+
+                    cursor.execute("COMMIT")
+                except Exception:
+                    cursor.execute("ROLLBACK")
+                    raise
 
-                cursor.execute("""
-                    INSERT OR REPLACE INTO metadata (key, value, updated_at)
-                    VALUES (?, ?, ?)
-                """, ("total_entries", str(total_entries), datetime.now().isoformat()))
-
-                conn.commit()
                 print(f"✅ Saved {total_entries} entries to database")
 
         except Exception as e:
             print(f"❌ Error saving to database: {str(e)}")
             raise
 
-    def export_to_json(self, timetable_data: Dict[str, List[Dict]]):
+    def _write_json(self, filename: str, data):
+        """Write data (or already-encoded JSON bytes) to the frontend data directory."""
+        if not isinstance(data, bytes):
+            data = orjson.dumps(
+                data, option=orjson.OPT_INDENT_2 if self.pretty_json else 0)
+        with open(os.path.join(self.json_output_path, filename), 'wb') as f:
+            f.write(data)
+
+    def _group_json_bytes(self, group_data: Dict) -> bytes:
+        """Encode a group timetable as compact JSON, encoding each entry exactly once."""
+        return b"".join([
+            b'{"group":', orjson.dumps(group_data["group"]),
+            b',"entries":[',
+            b",".join([orjson.dumps(e) for e in group_data["entries"]]),
+            b'],"total_classes":', orjson.dumps(group_data["total_classes"]),
+            b"}",
+        ])
+
+    def export_to_json(self, timetable_data: Dict[str, List[TimetableEntry]], now_iso: Optional[str] = None):
         """Export data to JSON files for frontend consumption"""
         try:
             print("📤 Exporting data to JSON files...")
 
+            now_iso = now_iso or datetime.now().isoformat()
+
             group_timetables = []
             for group, entries in timetable_data.items():
                 if entries:
                     group_timetable = {
                         "group": group,
-                        "entries": entries,
+                        "entries": [e.to_json() for e in entries],
                         "total_classes": len(entries)
                     }
                     group_timetables.append(group_timetable)
 
-            timetable_response = {
-                "success": True,
-                "data": group_timetables,
-                "total_groups": len(group_timetables),
-                "last_updated": datetime.now().isoformat()
-            }
-
-            with open(f"{self.json_output_path}/timetable.json", 'w') as f:
-                json.dump(timetable_response, f, indent=2)
-
-            for group_data in group_timetables:
+            if self.pretty_json:
+                group_jsons = group_timetables
+                timetable_response = {
+                    "success": True,
+                    "data": group_timetables,
+                    "total_groups": len(group_timetables),
+                    "last_updated": now_iso
+                }
+            else:
+                # Encode each group once and splice it into timetable.json as well
+                group_jsons = [self._group_json_bytes(g)
+                               for g in group_timetables]
+                timetable_response = b"".join([
+                    b'{"success":true,"data":[', b",".join(group_jsons),
+                    b'],"total_groups":', orjson.dumps(len(group_timetables)),
+                    b',"last_updated":', orjson.dumps(now_iso),
+                    b"}",
+                ])
+
+            self._write_json("timetable.json", timetable_response)
+
+            for group_data, group_json in zip(group_timetables, group_jsons):
                 group = group_data["group"].lower()
-                with open(f"{self.json_output_path}/group_{group}.json", 'w') as f:
-                    json.dump(group_data, f, indent=2)
+                self._write_json(f"group_{group}.json", group_json)
 
             courses: Dict[str, Dict] = {}
             for group_data in group_timetables:
@@ -554,13 +750,11 @@ class TimetableDataFetcher:
                             "course_name": entry["course"]["course_name"],
                             "instructor": entry["course"]["instructor"],
                             "credits": entry["course"]["credits"],
-                            "groups": [],
+                            "groups": set(),
                             "schedule": []
                         }
 
-                    if group_data["group"] not in courses[course_code]["groups"]:
-                        courses[course_code]["groups"].append(
-                            group_data["group"])
+                    courses[course_code]["groups"].add(group_data["group"])
 
                     courses[course_code]["schedule"].append({
                         "group": group_data["group"],
@@ -570,19 +764,20 @@ class TimetableDataFetcher:
                         "type": entry["entry_type"]
                     })
 
-            courses_response = {"courses": list(courses.values())}
-            with open(f"{self.json_output_path}/courses.json", 'w') as f:
-                json.dump(courses_response, f, indent=2)
+            courses_response = {"courses": [
+                {**course, "groups": sorted(course["groups"])}
+                for course in courses.values()
+            ]}
+            self._write_json("courses.json", courses_response)
 
             metadata = {
-                "last_updated": datetime.now().isoformat(),
+                "last_updated": now_iso,
                 "total_groups": len(group_timetables),
                 "total_entries": sum(len(entries) for entries in timetable_data.values()),
                 "groups": list(timetable_data.keys())
             }
 
-            with open(f"{self.json_output_path}/metadata.json", 'w') as f:
-                json.dump(metadata, f, indent=2)
+            self._write_json("metadata.json", metadata)
 
             print("✅ Successfully exported all JSON files")
 
@@ -590,19 +785,49 @@ class TimetableDataFetcher:
             print(f"❌ Error exporting to JSON: {str(e)}")
             raise
 
-    def run(self, range_name: Optional[str] = None):
+    def run(self, range_name: Optional[str] = None, force: bool = False):
         """Main execution method"""
         try:
+            now_iso = datetime.now().isoformat()
             print("🚀 Starting timetable data fetch...")
-            print(f"📅 Current time: {datetime.now().isoformat()}")
+            print(f"📅 Current time: {now_iso}")
 
             sheet_index = 0  # timetable is always the first sheet
+            a1_range = range_name or self.default_range
+
+            # Key the stored revision on what is fetched as well, so changing the
+            # range (e.g. the SHEET_RANGE secret) triggers a fresh fetch
+            revision = self.get_spreadsheet_revision()
+            revision_key = (f"{revision}|{sheet_index}|{a1_range}"
+                            if revision is not None else None)
+            if (not force and revision_key is not None
+                    and revision_key == self._get_metadata("last_revision")):
+                print(f"✅ No changes since last fetch (modified {revision})")
+                return
+
             raw_data = self.fetch_sheet_data(
                 sheet_index=sheet_index, range_override=range_name)
 
+            # The file can be re-saved without any cell changing; compare the
+            # actual values before rebuilding anything. The new revision is still
+            # recorded (a metadata-only change to the database) so that later runs
+            # short-circuit on the modifiedTime check again instead of re-fetching.
+            content_hash = hashlib.blake2b(
+                orjson.dumps(raw_data), digest_size=16).hexdigest()
+            if not force and content_hash == self._get_metadata("last_content_hash"):
+                if revision_key is not None:
+                    self._set_metadata({"last_revision": revision_key})
+                print("✅ Sheet content unchanged since last fetch")
+                return
+
             timetable_data = self.parse_timetable_data(raw_data)
-            self.save_to_database(timetable_data)
-            self.export_to_json(timetable_data)
+            self.save_to_database(timetable_data, now_iso)
+            self.export_to_json(timetable_data, now_iso)
+
+            state = {"last_content_hash": content_hash}
+            if revision_key is not None:
+                state["last_revision"] = revision_key
+            self._set_metadata(state)
 
             print("🎉 Timetable data fetch completed successfully!")
 
@@ -621,14 +846,19 @@ def main():
         "--credentials", help="Path to Google Service Account credentials JSON file")
     parser.add_argument(
         "--sheet-range", help="Optional A1 sheet range (overrides SHEET_RANGE/env)")
+    parser.add_argument("--force", action="store_true",
+                        help="Fetch and rebuild even if the spreadsheet is unchanged")
+    parser.add_argument("--pretty", action="store_true",
+                        help="Write indented JSON files (slower, easier to diff)")
     parser.add_argument("--verbose", "-v", action="store_true",
                         help="Enable verbose output")
 
     args = parser.parse_args()
 
     try:
-        fetcher = TimetableDataFetcher(credentials_path=args.credentials)
-        fetcher.run(range_name=args.sheet_range)
+        fetcher = TimetableDataFetcher(
+            credentials_path=args.credentials, pretty_json=args.pretty)
+        fetcher.run(range_name=args.sheet_range, force=args.force)
     except Exception as e:
         print(f"❌ Script failed: {str(e)}")
         exit(1)